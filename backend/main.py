@@ -1,16 +1,16 @@
 # backend/main.py
 from fastapi import FastAPI, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 import subprocess
 import sys
 import os
 import threading
 import time
 import csv
-import re
-import glob
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 app = FastAPI(title="AI Attention Backend", version="3.1")
 
@@ -48,26 +48,6 @@ def health():
 
 # ===================== attention_mvp 실행 & 로그 저장 =====================
 
-# attention_mvp.py 한 줄 예:
-# t=0.12 score=85.23 ear=0.250 gaze_h=0.032 gaze_v=0.020
-LINE_RE = re.compile(
-    r"score=(?P<score>[-0-9.]+).*ear=(?P<ear>[-0-9.]+).*gaze_h=(?P<gaze_h>[-0-9.]+).*gaze_v=(?P<gaze_v>[-0-9.]+)"
-)
-
-
-def parse_line(line: str) -> Optional[Dict[str, str]]:
-    """stdout 한 줄에서 score/ear/gaze 값 추출"""
-    m = LINE_RE.search(line)
-    if not m:
-        return None
-    return {
-        "score": m.group("score"),
-        "ear": m.group("ear"),
-        "gaze_h": m.group("gaze_h"),
-        "gaze_v": m.group("gaze_v"),
-    }
-
-
 @app.post("/run-attention")
 def run_attention(
     id: Optional[str] = Body(None),
@@ -79,7 +59,7 @@ def run_attention(
 ):
     """
     프론트에서 호출해서 attention_mvp.py 실행
-    - stdout을 읽어 backend/logs/run_*.csv 로 저장
+    - attention_mvp.py가 backend/logs/run_*.csv 에 직접 기록 (--log --csv-path)
     """
     spath = script_path()
     if not os.path.exists(spath):
@@ -89,7 +69,7 @@ def run_attention(
     run_id = f"run_{int(time.time())}"
     log_path = os.path.join(LOG_DIR, f"{run_id}.csv")
 
-    # CSV 헤더 생성
+    # CSV 헤더 생성 (스크립트가 뜨기 전에도 /logs 목록에 보이도록)
     try:
         with open(log_path, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
@@ -118,45 +98,19 @@ def run_attention(
     # 컨트롤 창 (START / PAUSE / QUIT, 항상 위)
     args += ["--control-window", "--control-topmost"]
 
+    # CSV 기록은 스크립트가 직접
+    args += ["--log", "--csv-path", log_path]
+
     try:
-        proc = subprocess.Popen(
+        subprocess.Popen(
             args,
             cwd=SCRIPT_DIR,  # scripts 폴더 기준 실행
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
         )
     except Exception as e:
         return {"status": "error", "message": f"Failed to start script: {e}"}
 
-    # stdout → CSV 저장 쓰레드
-    def reader_thread():
-        try:
-            with open(log_path, "a", newline="", encoding="utf-8") as f:
-                w = csv.writer(f)
-                for line in proc.stdout or []:
-                    line = line.strip()
-                    parsed = parse_line(line)
-                    if not parsed:
-                        continue
-                    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-                    w.writerow(
-                        [
-                            ts,
-                            parsed["score"],
-                            parsed["ear"],
-                            parsed["gaze_h"],
-                            parsed["gaze_v"],
-                        ]
-                    )
-                    f.flush()
-        except Exception as e:
-            print(f"[reader_thread ERROR] {e}", flush=True)
-
-    t = threading.Thread(target=reader_thread, daemon=True)
-    t.start()
-
     meta = {
         "run_id": run_id,
         "title": title,
@@ -170,59 +124,161 @@ def run_attention(
 # ===================== 로그 조회 유틸 =====================
 
 
+# 폴링 요청마다 디스크를 다시 읽지 않도록 stat 기반 캐시
+# - _LATEST_CACHE: {path: (mtime_ns, size, row)}
+# - _LOG_LIST_CACHE: LOG_DIR mtime이 같으면 csv 목록 재사용
+_CACHE_LOCK = threading.Lock()
+_LATEST_CACHE: Dict[str, Tuple[int, int, Optional[Dict[str, Any]]]] = {}
+_LOG_LIST_CACHE: Dict[str, Any] = {"dir_mtime": -1, "files": []}
+
+
+def _scan_log_files() -> List[str]:
+    """LOG_DIR를 한 번 훑어서 csv 경로 목록 (최신순, 캐시 없음)"""
+    with os.scandir(LOG_DIR) as it:
+        entries = [e for e in it if e.name.endswith(".csv")]
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    return [e.path for e in entries]
+
+
 def list_log_files() -> List[str]:
-    """logs 폴더 안의 csv 목록 (최신순)"""
-    paths = glob.glob(os.path.join(LOG_DIR, "*.csv"))
-    paths.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return paths
+    """
+    logs 폴더 안의 csv 목록 (최신순)
+    - 순서만 캐시 (파일에 행이 추가돼도 LOG_DIR mtime은 그대로라 mtime 값은 재사용 안 함)
+    """
+    dir_mtime = os.stat(LOG_DIR).st_mtime_ns
+    with _CACHE_LOCK:
+        if _LOG_LIST_CACHE["dir_mtime"] == dir_mtime:
+            return list(_LOG_LIST_CACHE["files"])
+
+    files = _scan_log_files()
+
+    with _CACHE_LOCK:
+        _LOG_LIST_CACHE["dir_mtime"] = dir_mtime
+        _LOG_LIST_CACHE["files"] = files
+    return list(files)
+
+
+TAIL_BLOCK_SIZE = 8192  # 뒤에서부터 읽을 블록 크기 (bytes)
+
+
+def _row_to_latest(row: List[str]) -> Optional[Dict[str, Any]]:
+    """csv 한 행 → 응답용 dict (헤더/불완전 행이면 None)"""
+    if len(row) < 5:
+        return None
+    if row[0].strip().lower() == "ts":
+        # 헤더
+        return None
+    ts, score, ear, gh, gv = row[:5]
+    return {
+        "ts": ts.strip(),
+        "score": score.strip(),
+        "ear": ear.strip(),
+        "gaze_h": gh.strip(),
+        "gaze_v": gv.strip(),
+    }
+
+
+def _read_latest_row_full(path: str) -> Optional[Dict[str, Any]]:
+    """작은 파일용: 전체를 읽어서 뒤에서부터 훑기"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    # 쓰는 중인 마지막 줄(개행 없음)은 제외
+    text = text[: text.rfind("\n") + 1]
+    rows = list(csv.reader(text.splitlines(keepends=True)))
+    for row in reversed(rows):
+        latest = _row_to_latest(row)
+        if latest:
+            return latest
+    return None
+
+
+def _read_latest_row_tail(path: str, size: int) -> Optional[Dict[str, Any]]:
+    """
+    큰 파일용: EOF에서부터 블록 단위로 거꾸로 읽으면서
+    마지막 '완전한' 데이터 행만 csv로 파싱
+    """
+    with open(path, "rb") as f:
+        buf = b""
+        offset = size
+        tail_trimmed = False
+        while offset > 0:
+            step = min(TAIL_BLOCK_SIZE, offset)
+            offset -= step
+            f.seek(offset)
+            buf = f.read(step) + buf
+
+            if not tail_trimmed:
+                # 쓰는 중인 마지막 줄(개행 없음)은 제외
+                nl = buf.rfind(b"\n")
+                if nl < 0:
+                    continue
+                buf = buf[: nl + 1]
+                tail_trimmed = True
+
+            lines = buf.split(b"\n")
+            # 파일 처음까지 읽지 않았다면 lines[0]은 잘린 줄일 수 있음
+            complete = lines if offset == 0 else lines[1:]
+            for raw in reversed(complete):
+                if not raw.strip():
+                    continue
+                line = raw.decode("utf-8", errors="replace")
+                latest = _row_to_latest(next(csv.reader([line])))
+                if latest:
+                    return latest
+            # 완전한 줄이 하나도 유효하지 않으면 잘린 앞부분만 남기고 계속
+            if offset > 0:
+                buf = lines[0]
+        return None
 
 
 def read_latest_row_from_csv(path: str) -> Optional[Dict[str, Any]]:
     """
     해당 csv에서 마지막 '유효한' 데이터 행 하나 읽어서 반환
     - 빈 줄/헤더는 건너뜀
+    - 파일 전체를 읽지 않고 끝에서부터 블록 단위로 읽음
+    - (mtime, size)가 그대로면 캐시된 결과 반환
     """
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            rows = list(csv.reader(f))
-
-        # 뒤에서부터 훑으면서 데이터 행 찾기
-        for row in reversed(rows):
-            if len(row) < 5:
-                continue
-            if row[0].strip().lower() == "ts":
-                # 헤더
-                continue
-            ts, score, ear, gh, gv = row[:5]
-            return {
-                "ts": ts.strip(),
-                "score": score.strip(),
-                "ear": ear.strip(),
-                "gaze_h": gh.strip(),
-                "gaze_v": gv.strip(),
-            }
-
-        return None
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        with _CACHE_LOCK:
+            cached = _LATEST_CACHE.get(path)
+        if cached and cached[:2] == key:
+            return cached[2]
+
+        if st.st_size < TAIL_BLOCK_SIZE:
+            row = _read_latest_row_full(path)
+        else:
+            row = _read_latest_row_tail(path, st.st_size)
+
+        with _CACHE_LOCK:
+            _LATEST_CACHE[path] = (key[0], key[1], row)
+        return row
     except Exception as e:
         print(f"[read_latest_row_from_csv ERROR] {e}", flush=True)
         return None
 
 
-# ===================== 엔드포인트: 실행 목록 & 최신 샘플 =====================
-
-@app.get("/logs")
-def list_logs():
+def _run_created_at(run_id: str, path: str) -> float:
     """
-    저장된 실행(run) 목록 반환
-    - run_id, created_at 등
+    run 생성 시각 (epoch)
+    - run_<epoch> 형식이면 이름의 epoch (/run-attention이 만든 시각, 변하지 않음)
+    - 그 외 파일은 현재 mtime
     """
-    files = list_log_files()
+    prefix, _, epoch = run_id.partition("_")
+    if prefix == "run" and epoch.isdigit():
+        return float(epoch)
+    return os.path.getmtime(path)
+
+
+def _build_run_list() -> List[Dict[str, Any]]:
+    """/logs 응답용 실행 목록 (목록 조회 + 시각 계산을 threadpool 한 번에)"""
     data = []
-    for p in files:
+    for p in list_log_files():
         name = os.path.basename(p)
         run_id = name.replace(".csv", "")
         created = time.strftime(
-            "%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(p))
+            "%Y-%m-%d %H:%M:%S", time.localtime(_run_created_at(run_id, p))
         )
         data.append(
             {
@@ -233,38 +289,88 @@ def list_logs():
                 "created_at": created,
             }
         )
-    return JSONResponse({"status": "ok", "data": data})
+    return data
+
 
+def _latest_row_any() -> Optional[Dict[str, Any]]:
+    """가장 최근 csv의 마지막 행 (목록 조회 + 읽기를 threadpool 한 번에)"""
+    files = list_log_files()
+    if not files:
+        return None
+    return read_latest_row_from_csv(files[0])
+
+
+def _latest_row_for_run(path: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """(csv 존재 여부, 마지막 행) (존재 확인 + 읽기를 threadpool 한 번에)"""
+    if not os.path.exists(path):
+        return False, None
+    return True, read_latest_row_from_csv(path)
+
+
+# ===================== 엔드포인트: 실행 목록 & 최신 샘플 =====================
 
-@app.get("/logs/latest")
-def latest_any():
+# 응답 스키마 (response_model 지정 → FastAPI/pydantic 직렬화 경로 사용)
+class RunInfo(BaseModel):
+    id: str
+    title: str
+    start: Optional[str] = None
+    isOnline: Optional[bool] = None
+    created_at: str
+
+
+class RunListResponse(BaseModel):
+    status: str
+    data: List[RunInfo]
+
+
+class LatestRow(BaseModel):
+    ts: str
+    score: str
+    ear: str
+    gaze_h: str
+    gaze_v: str
+
+
+class LatestResponse(BaseModel):
+    status: str
+    data: Optional[LatestRow] = None
+
+
+@app.get("/logs", response_model=RunListResponse)
+async def list_logs():
+    """
+    저장된 실행(run) 목록 반환
+    - run_id, created_at 등
+    """
+    data = await run_in_threadpool(_build_run_list)
+    return {"status": "ok", "data": data}
+
+
+@app.get("/logs/latest", response_model=LatestResponse)
+async def latest_any():
     """
     가장 최근 실행(run)의 마지막 샘플 1개 반환
     - 실행 선택 안 했을 때(최신 라이브 모드)에 사용
     """
-    files = list_log_files()
-    if not files:
-        return JSONResponse({"status": "ok", "data": None})
-    latest_path = files[0]
-    row = read_latest_row_from_csv(latest_path)
+    row = await run_in_threadpool(_latest_row_any)
     if not row:
-        return JSONResponse({"status": "ok", "data": None})
-    return JSONResponse({"status": "ok", "data": row})
+        return {"status": "ok", "data": None}
+    return {"status": "ok", "data": row}
 
 
-@app.get("/logs/{run_id}/latest")
-def latest_for_run(run_id: str):
+@app.get("/logs/{run_id}/latest", response_model=LatestResponse)
+async def latest_for_run(run_id: str):
     """
     특정 실행(run_id)의 마지막 샘플 1개 반환
     - 실행 목록에서 골랐을 때 사용
     """
     path = os.path.join(LOG_DIR, f"{run_id}.csv")
-    if not os.path.exists(path):
+    exists, row = await run_in_threadpool(_latest_row_for_run, path)
+    if not exists:
         return JSONResponse(
             {"status": "error", "message": f"log not found for run_id={run_id}"},
             status_code=404,
         )
-    row = read_latest_row_from_csv(path)
     if not row:
-        return JSONResponse({"status": "ok", "data": None})
-    return JSONResponse({"status": "ok", "data": row})
+        return {"status": "ok", "data": None}
+    return {"status": "ok", "data": row}
@@ -9,13 +9,13 @@ attention_mvp.py (100-cap option, stable gauge, control window)
 - Face-present hysteresis (플리커 억제)
 - 개인 EAR 칼리브레이션(자동 2초, 기본값보다 높아지지 않게 완화)
 - Gaze 데드존 확장 + '완벽 자세' 보너스(최대치 쉽게 도달)
-- On-screen HUD; optional CSV logging; stdout telemetry
+- On-screen HUD; optional CSV logging (--log [--csv-path PATH]); stdout telemetry
 Usage:
   python attention_mvp.py --camera 0 --control-window --always-on-top
   python attention_mvp.py --video path/to/file.mp4 --win-pos bottom-right
   (시작부터 100으로 시작): --start-100
 Keys:
-  q: quit,  s: toggle text,  l: toggle logging
+  q: quit,  s: toggle text,  l: toggle logging (ignored with --csv-path)
 """
 import argparse
 import csv
@@ -38,6 +38,15 @@ except Exception as e:
         f"Original error: {e}"
     )
 
+# ---- numba (선택): 없으면 순수 파이썬으로 동작 ----
+try:
+    from numba import njit
+except Exception:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
 WIN_NAME = "Attention MVP"
 
 # ------------------------ Config ------------------------
@@ -69,9 +78,18 @@ WARMUP_END_SCORE    = 100.0
 # Slew-rate limit (per processing step)
 MAX_RISE_PER_STEP   = 2.5   
 MAX_FALL_PER_STEP   = 100.0
+# Score weights (gaze_h / gaze_v / EAR / blink 감점 가중치)
+SCORE_W_GAZE_H      = 0.8
+SCORE_W_GAZE_V      = 0.6
+SCORE_W_EAR         = 1.0
+SCORE_W_BLINK       = 1.2
 # Face presence hysteresis (플리커 억제)
 FACE_HIT_CONSEC     = 3     
 FACE_MISS_CONSEC    = 6      # 6 연속 미감지 시 absent로
+# FaceMesh 입력 최대 폭 (비율 유지, 이보다 작은 소스는 그대로)
+PROC_MAX_WIDTH      = 640
+# 비처리 프레임의 최소 화면 갱신 간격 (초)
+SHOW_INTERVAL       = 0.033
 
 # 런타임 상태
 EAR_TARGET_CAL = None
@@ -92,6 +110,18 @@ LEFT_EYE  = [33, 160, 158, 133, 153, 144]
 RIGHT_EYE = [362, 385, 387, 263, 373, 380]
 RIGHT_IRIS = [468, 469, 470, 471]
 LEFT_IRIS  = [472, 473, 474, 475]
+# 프레임마다 리스트→배열 변환하지 않도록 미리 만들어 둔 인덱스 배열
+# 양쪽 눈을 한 번에 처리: [왼쪽, 오른쪽] 순서
+EYES_IDX   = np.array([LEFT_EYE, RIGHT_EYE], dtype=np.intp)     # (2,6)
+IRISES_IDX = np.array([LEFT_IRIS, RIGHT_IRIS], dtype=np.intp)   # (2,4)
+N_EYE_PTS  = EYES_IDX.size
+# 실제로 쓰는 랜드마크만 (눈 12 + 홍채 8), protobuf 인덱싱용 파이썬 int 리스트
+USED_LM_IDX = np.concatenate([EYES_IDX.ravel(), IRISES_IDX.ravel()]).tolist()
+# EAR 거리쌍 (p2-p6, p3-p5, p1-p4)
+EAR_PAIR_A = np.array([1, 2, 0], dtype=np.intp)
+EAR_PAIR_B = np.array([5, 4, 3], dtype=np.intp)
+GAZE_DEADZONE = np.array([GAZE_DEADZONE_X, GAZE_DEADZONE_Y], dtype=np.float32)
+GAZE_RANGE    = np.array([0.5, 0.4], dtype=np.float32)
 
 # ===== 창 제어 =====
 def get_screen_size():
@@ -190,55 +220,53 @@ class ControlUI(threading.Thread):
         root.mainloop()
 
 # ===== 비전 헬퍼 =====
-def pts_from_landmarks(landmarks, image_shape, indices):
+def pts_from_landmarks(landmarks, image_shape):
+    """사용하는 20개 랜드마크만 → 픽셀 좌표 (20,2) int32 배열 (눈 12 + 홍채 8 순서)"""
     h, w = image_shape[:2]
-    pts = []
-    for idx in indices:
-        lm = landmarks[idx]
-        pts.append((int(lm.x * w), int(lm.y * h)))
-    return np.array(pts, dtype=np.int32)
-
-def ear(eye_pts):
-    p1, p2, p3, p4, p5, p6 = eye_pts.astype(np.float32)
-    A = np.linalg.norm(p2 - p6)
-    B = np.linalg.norm(p3 - p5)
-    C = np.linalg.norm(p1 - p4)
-    if C < 1e-6:
-        return 0.0
-    return float((A + B) / (2.0 * C))
-
-def center_of(pts):
-    return np.mean(pts.astype(np.float32), axis=0)
+    xy = np.array([(landmarks[i].x, landmarks[i].y) for i in USED_LM_IDX], dtype=np.float32)
+    xy *= np.array([w, h], dtype=np.float32)
+    return xy.astype(np.int32)
 
+@njit(cache=True, fastmath=True)
 def clamp01(x):
     return max(0.0, min(1.0, float(x)))
 
-def gaze_offset_for_eye(eye_pts, iris_pts):
-    p1, p4 = eye_pts[0], eye_pts[3]
-    eye_w = np.linalg.norm(p1 - p4)
-    if eye_w < 1e-6:
-        return 0.0, 0.0
-    eye_c  = center_of(eye_pts)
-    iris_c = center_of(iris_pts)
-    dx = (iris_c[0] - eye_c[0]) / eye_w
-    dy = (iris_c[1] - eye_c[1]) / eye_w
-    if abs(dx) < GAZE_DEADZONE_X: dx = 0.0
-    if abs(dy) < GAZE_DEADZONE_Y: dy = 0.0
-    off_x = clamp01(abs(dx) / 0.5)
-    off_y = clamp01(abs(dy) / 0.4)
-    return off_x, off_y
+def ear_gaze_batch(eyes, irises):
+    """
+    양쪽 눈 (2,6,2) / 홍채 (2,4,2) 좌표 → (ear 평균, gaze_h, gaze_v)
+    눈마다 따로 norm을 부르지 않고 한 번에 계산
+    """
+    eyes = eyes.astype(np.float32)
+    irises = irises.astype(np.float32)
+    d = np.linalg.norm(eyes[:, EAR_PAIR_A] - eyes[:, EAR_PAIR_B], axis=-1)  # (2,3): A,B,C
+    eye_w = d[:, 2]
+    valid = eye_w >= 1e-6
+    safe_w = np.where(valid, eye_w, 1.0)
+
+    ears = np.where(valid, (d[:, 0] + d[:, 1]) / (2.0 * safe_w), 0.0)
+
+    # 홍채 중심 - 눈 중심 (눈 폭으로 정규화), 데드존 적용 후 0~1로
+    off = (irises.mean(axis=1) - eyes.mean(axis=1)) / safe_w[:, None]
+    off = np.where(np.abs(off) < GAZE_DEADZONE, 0.0, off)
+    off = np.clip(np.abs(off) / GAZE_RANGE, 0.0, 1.0)
+    off[~valid] = 0.0
+
+    return float(ears.mean()), float(off[:, 0].mean()), float(off[:, 1].mean())
 
 # ===== 스코어 로직 =====
-def attention_score(gaze_h, gaze_v, ear_val, blink_streak, a=0.8, b=0.6, c=1.0, d=1.2):
+def current_ear_target():
     # 개인 타깃이 기본값보다 높아지지 않게 (상시 감점 방지)
     cal = EAR_TARGET_CAL if EAR_TARGET_CAL is not None else EAR_TARGET_DEFAULT
-    ear_target = min(EAR_TARGET_DEFAULT, cal)
+    return float(min(EAR_TARGET_DEFAULT, cal))
 
+@njit(cache=True, fastmath=True)
+def attention_score(gaze_h, gaze_v, ear_val, blink_streak, ear_target):
+    # 가중치는 모듈 상수 (기본 인자를 두면 numba 호출이 느린 경로로 빠짐)
     s = 100.0
-    s -= a * clamp01(gaze_h) * 40.0
-    s -= b * clamp01(gaze_v) * 25.0
-    s -= c * max(0.0, (ear_target - max(0.0, ear_val))) * 40.0 / max(ear_target, 1e-6)
-    s -= d * clamp01(blink_streak/10.0) * 10.0
+    s -= SCORE_W_GAZE_H * clamp01(gaze_h) * 40.0
+    s -= SCORE_W_GAZE_V * clamp01(gaze_v) * 25.0
+    s -= SCORE_W_EAR * max(0.0, (ear_target - max(0.0, ear_val))) * 40.0 / max(ear_target, 1e-6)
+    s -= SCORE_W_BLINK * clamp01(blink_streak/10.0) * 10.0
 
     s = float(max(0.0, min(100.0, s)))
 
@@ -265,12 +293,35 @@ def draw_hud(frame, score, ear_val, gaze_h, gaze_v):
         cv2.putText(frame, f"Gaze(h,v)=({gaze_h:.2f},{gaze_v:.2f})",
                     (x0, y0+bar_h+45), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (200,200,200), 1, cv2.LINE_AA)
 
+def proc_size_for(image_shape):
+    """FaceMesh 입력 크기 (w, h): 원본 비율 유지, 폭은 PROC_MAX_WIDTH 이하 (확대 안 함)"""
+    h, w = image_shape[:2]
+    scale = min(1.0, PROC_MAX_WIDTH / w)
+    return max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+
+def draw_points(frame, pts, color):
+    """점마다 cv2.circle 대신 3x3 픽셀을 NumPy 인덱싱으로 한 번에 칠함"""
+    h, w = frame.shape[:2]
+    xs = pts[:, 0]
+    ys = pts[:, 1]
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            frame[np.clip(ys + dy, 0, h - 1), np.clip(xs + dx, 0, w - 1)] = color
+
+@njit(cache=True, fastmath=True)
 def slew_limit(prev: float, target: float, rise: float, fall: float):
     if target > prev:
         return min(target, prev + rise)
     else:
         return max(target, prev - fall)
 
+def open_csv_log(path: str):
+    # line-buffered: 백엔드가 다른 핸들로 마지막 행을 바로 읽을 수 있게
+    f = open(path, "w", newline="", encoding="utf-8", buffering=1)
+    w = csv.writer(f)
+    w.writerow(["ts", "score", "ear", "gaze_h", "gaze_v"])
+    return f, w
+
 # ===== 메인 =====
 def main():
     global EAR_TARGET_CAL, _cal_running, _cal_t0, _cal_ears
@@ -295,6 +346,8 @@ def main():
     # 처리
     ap.add_argument("--fps", type=int, default=CFG.fps_sample)
     ap.add_argument("--log", action="store_true")
+    # 지정 시: 해당 경로에 항상 기록 ([l] 토글 무시), stdout 텔레메트리 생략 (백엔드 실행용)
+    ap.add_argument("--csv-path", type=str, default=None)
 
     # 새 옵션: 시작부터 100
     ap.add_argument("--start-100", action="store_true",
@@ -302,6 +355,10 @@ def main():
 
     args = ap.parse_args()
     CFG.log_csv = bool(args.log)
+    log_locked = args.csv_path is not None
+    if log_locked:
+        CFG.csv_path = args.csv_path
+        CFG.log_csv = True
 
     # 소스 오픈 (CAP_DSHOW 문제 시 백엔드 제거)
     if args.camera is not None:
@@ -350,14 +407,22 @@ def main():
     # 타이밍
     proc_fps = max(1, int(args.fps))
     last_t = time.time()
+    last_show = 0.0
 
     # CSV
     csv_writer = None
     csv_file = None
     if CFG.log_csv:
-        csv_file = open(CFG.csv_path, "w", newline="", encoding="utf-8")
-        csv_writer = csv.writer(csv_file)
-        csv_writer.writerow(["ts", "score", "ear", "gaze_h", "gaze_v"])
+        csv_file, csv_writer = open_csv_log(CFG.csv_path)
+
+    # FaceMesh 입력 버퍼 (첫 프레임/해상도 변경 시에만 할당, process()는 동기 호출)
+    buf_shape = None
+    proc_size = None
+    small_buf = None
+    rgb_buf   = None
+
+    footer_text = ("[q] quit  [s] toggle text" if log_locked
+                   else "[q] quit  [s] toggle text  [l] toggle logging")
 
     start_t = time.time()
 
@@ -399,8 +464,25 @@ def main():
 
             if do_process:
                 last_t = now
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                if frame.shape != buf_shape:
+                    buf_shape = frame.shape
+                    proc_size = proc_size_for(frame.shape)
+                    small_buf = (np.empty((proc_size[1], proc_size[0], 3), dtype=np.uint8)
+                                 if proc_size[0] < frame.shape[1] else None)
+                    rgb_buf = np.empty((proc_size[1], proc_size[0], 3), dtype=np.uint8)
+
+                # FaceMesh 입력은 축소본으로 (랜드마크는 정규화 좌표라 원본 프레임에 그대로 사용)
+                bgr = frame
+                if small_buf is not None:
+                    cv2.resize(frame, proc_size, dst=small_buf, interpolation=cv2.INTER_AREA)
+                    bgr = small_buf
+                cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb_buf)
+                rgb = rgb_buf
+                # 읽기 전용으로 넘기면 MediaPipe가 복사 없이 참조
+                rgb.flags.writeable = False
                 res = face_mesh.process(rgb)
+                # 다음 프레임에서 cvtColor(dst=...)로 다시 써야 하므로 복구
+                rgb.flags.writeable = True
 
                 ear_val = 0.0; gaze_h = 0.0; gaze_v = 0.0
 
@@ -418,16 +500,10 @@ def main():
                             ema_score = min(ema_score, WARMUP_START_SCORE)
 
                     lm = res.multi_face_landmarks[0].landmark
-                    leye = pts_from_landmarks(lm, frame.shape, LEFT_EYE)
-                    reye = pts_from_landmarks(lm, frame.shape, RIGHT_EYE)
-                    ear_val = (ear(leye) + ear(reye)) * 0.5
-
-                    l_iris = pts_from_landmarks(lm, frame.shape, LEFT_IRIS)
-                    r_iris = pts_from_landmarks(lm, frame.shape, RIGHT_IRIS)
-                    gx_l, gy_l = gaze_offset_for_eye(leye, l_iris)
-                    gx_r, gy_r = gaze_offset_for_eye(reye, r_iris)
-                    gaze_h = float((gx_l + gx_r) * 0.5)
-                    gaze_v = float((gy_l + gy_r) * 0.5)
+                    pts    = pts_from_landmarks(lm, frame.shape)         # (20,2)
+                    eyes   = pts[:N_EYE_PTS].reshape(EYES_IDX.shape + (2,))   # (2,6,2)
+                    irises = pts[N_EYE_PTS:].reshape(IRISES_IDX.shape + (2,)) # (2,4,2)
+                    ear_val, gaze_h, gaze_v = ear_gaze_batch(eyes, irises)
 
                     # --- Calibration (정면 응시일 때만 누적)
                     if EAR_TARGET_CAL is None and not _cal_running:
@@ -454,7 +530,7 @@ def main():
                         blink_streak = max(0, blink_streak - 2)
 
                     # --- Raw score
-                    raw = attention_score(gaze_h, gaze_v, ear_val, blink_streak)
+                    raw = attention_score(gaze_h, gaze_v, ear_val, blink_streak, current_ear_target())
 
                     # --- EMA target + warm-up 상한(타깃에 적용)
                     ema_target = (1.0 - CFG.ema_alpha) * ema_score + CFG.ema_alpha * raw
@@ -470,8 +546,7 @@ def main():
                     ema_score = slew_limit(ema_score, ema_target, MAX_RISE_PER_STEP, MAX_FALL_PER_STEP)
 
                     # draw
-                    for p in np.concatenate([leye, reye, l_iris, r_iris], axis=0):
-                        cv2.circle(frame, tuple(p), 1, (0, 255, 255), -1)
+                    draw_points(frame, pts, (0, 255, 255))
                     draw_hud(frame, ema_score, ear_val, gaze_h, gaze_v)
 
                     # 상태 텍스트
@@ -500,24 +575,26 @@ def main():
 
                 # telemetry/logging
                 t_sec = time.time() - start_t
-                print(f"t={t_sec:.2f} score={ema_score:.2f} ear={ear_val:.3f} gaze_h={gaze_h:.3f} gaze_v={gaze_v:.3f}", flush=True)
+                if not log_locked:
+                    print(f"t={t_sec:.2f} score={ema_score:.2f} ear={ear_val:.3f} gaze_h={gaze_h:.3f} gaze_v={gaze_v:.3f}", flush=True)
                 if CFG.log_csv and csv_writer:
                     csv_writer.writerow([f"{time.time():.3f}", f"{ema_score:.3f}", f"{ear_val:.4f}", f"{gaze_h:.4f}", f"{gaze_v:.4f}"])
 
             # footer & key
-            cv2.putText(frame, "[q] quit  [s] toggle text  [l] toggle logging",
+            cv2.putText(frame, footer_text,
                         (20, frame.shape[0]-20), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (230,230,230), 1, cv2.LINE_AA)
-            cv2.imshow(WIN_NAME, frame)
+            # 처리 프레임이거나 일정 시간 지났을 때만 화면 갱신 (키 입력은 매번 확인)
+            if do_process or (now - last_show) > SHOW_INTERVAL:
+                cv2.imshow(WIN_NAME, frame)
+                last_show = now
             key = cv2.waitKey(1) & 0xFF
             if key == ord('q'):
                 break
             elif key == ord('s'):
                 CFG.show_text = not CFG.show_text
-            elif key == ord('l'):
+            elif key == ord('l') and not log_locked:
                 if not CFG.log_csv and csv_writer is None:
-                    csv_file = open(CFG.csv_path, "w", newline="", encoding="utf-8")
-                    csv_writer = csv.writer(csv_file)
-                    csv_writer.writerow(["ts", "score", "ear", "gaze_h", "gaze_v"])
+                    csv_file, csv_writer = open_csv_log(CFG.csv_path)
                 CFG.log_csv = not CFG.log_csv
 
             _face_present_prev = _face_present